@@ -5,11 +5,15 @@ Test script for API validation system
 
 import sys
 import os
+import shutil
+import subprocess
+import tempfile
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
 from validation.api_identifier import APIIdentifier
 from validation.api_validator import APIValidator
 from validation.meta_file_finder import MetaFileFinder
+from validation.git_utils import GitUtils
 
 
 def test_api_identification():
@@ -140,6 +144,90 @@ def test_validation_skip_logic():
         return False
 
 
+def test_commit_message_amend():
+    """Test that amending the commit message only changes the message."""
+    print("\n=== Testing Commit Message Amend ===")
+    
+    repo = tempfile.mkdtemp()
+    
+    def git(*args, **kwargs):
+        return subprocess.run(['git', *args], cwd=repo, check=True, capture_output=True, **kwargs).stdout
+    
+    try:
+        git('init', '-q')
+        git('config', 'user.name', 'Test Committer')
+        git('config', 'user.email', 'committer@example.com')
+        git('commit', '-q', '--allow-empty', '-m', 'base')
+        git('checkout', '-q', '-b', 'side')
+        git('commit', '-q', '--allow-empty', '-m', 'side')
+        git('checkout', '-q', '-')
+        author_env = dict(
+            os.environ,
+            GIT_AUTHOR_NAME='Test Author',
+            GIT_AUTHOR_EMAIL='author@example.com',
+            GIT_AUTHOR_DATE='1500000000 +0530'
+        )
+        git('merge', '-q', '--no-ff', '-m', 'merge', 'side', env=author_env)
+        parents_before = git('rev-parse', 'HEAD^1', 'HEAD^2')
+        
+        new_message = "merge side\n\ntrailing spaces   \n\n\n\nform\x0cfeed and \u2028 kept\n\n"
+        with GitUtils(repo) as git_utils:
+            amended = git_utils.amend_commit_message(new_message)
+        
+        # git stripspace applies the same cleanup `git commit` does
+        expected_message = git('stripspace', input=new_message.encode('utf-8'))
+        raw_commit = git('cat-file', 'commit', 'HEAD')
+        checks = {
+            'amend succeeded': amended,
+            'author kept': git('log', '-1', '--format=%an|%ae|%ad', '--date=raw')
+                           == b'Test Author|author@example.com|1500000000 +0530\n',
+            'merge parents kept': git('rev-parse', 'HEAD^1', 'HEAD^2') == parents_before,
+            'reflog entry': git('reflog', '-1', '--format=%gs') == b'commit (amend): merge side\n',
+            'message identical': raw_commit.split(b'\n\n', 1)[1] == expected_message
+        }
+        
+        # A commit recorded in a non-UTF-8 encoding keeps its encoding header
+        git('config', 'i18n.commitEncoding', 'ISO-8859-1')
+        git('commit', '-q', '--allow-empty', '-F', '-', input='café subject\n'.encode('latin-1'))
+        with GitUtils(repo) as git_utils:
+            read_back = git_utils.get_last_commit_message()
+            amended = git_utils.append_to_commit_message('needed', ['an error'], [])
+        checks['non-UTF-8 message read'] = read_back == 'café subject'
+        checks['non-UTF-8 amend succeeded'] = amended
+        checks['non-UTF-8 message kept'] = git('-c', 'i18n.logOutputEncoding=UTF-8', 'log', '-1', '--format=%B') \
+                                           .startswith('café subject\n'.encode('utf-8'))
+        checks['encoding header kept'] = b'\nencoding ISO-8859-1\n' in git('cat-file', 'commit', 'HEAD')
+        git('config', '--unset', 'i18n.commitEncoding')
+        
+        # Extra headers such as mergetag are carried over
+        head = git('cat-file', 'commit', 'HEAD').decode('latin-1')
+        headers, _ = head.split('\n\n', 1)
+        headers = '\n'.join(line for line in headers.split('\n') if not line.startswith('encoding '))
+        mergetag = 'mergetag object 0000000000000000000000000000000000000000\n type commit\n tag v1\n'
+        crafted = f"{headers}\n{mergetag}\nwith mergetag\n"
+        crafted_sha = git('hash-object', '-t', 'commit', '-w', '--stdin', input=crafted.encode('utf-8')).strip()
+        git('update-ref', 'HEAD', crafted_sha)
+        with GitUtils(repo) as git_utils:
+            amended = git_utils.amend_commit_message('with mergetag, amended\n')
+        raw_commit = git('cat-file', 'commit', 'HEAD')
+        checks['extra header amend succeeded'] = amended
+        checks['extra header kept'] = mergetag.encode('utf-8') in raw_commit
+        checks['extra header message'] = raw_commit.endswith(b'\n\nwith mergetag, amended\n')
+        
+        for name, ok in checks.items():
+            print(f"  {name}: {'✓' if ok else '✗'}")
+        
+        success = all(checks.values())
+        print(f"✓ Commit message amend works correctly" if success else "✗ Commit message amend failed")
+        return success
+        
+    except Exception as e:
+        print(f"✗ Commit message amend test failed: {e}")
+        return False
+    finally:
+        shutil.rmtree(repo, ignore_errors=True)
+
+
 def create_sample_meta_files():
     """Create sample meta files for testing."""
     print("\n=== Creating Sample Meta Files for Testing ===")
@@ -184,7 +272,6 @@ method: GET
 def cleanup_test_files():
     """Clean up test files."""
     try:
-        import shutil
         if os.path.exists('test_api'):
             shutil.rmtree('test_api')
         print("✓ Test files cleaned up")
@@ -197,7 +284,7 @@ def main():
     print("Running API Validation System Tests...\n")
     
     tests_passed = 0
-    total_tests = 6
+    total_tests = 7
     
     # Test 1: API Identification
     try:
@@ -238,7 +325,14 @@ def main():
     else:
         print("✗ Validation skip logic test failed")
     
-    # Test 6: Sample Meta Files
+    # Test 6: Commit Message Amend
+    if test_commit_message_amend():
+        tests_passed += 1
+        print("✓ Commit message amend test passed")
+    else:
+        print("✗ Commit message amend test failed")
+    
+    # Test 7: Sample Meta Files
     if create_sample_meta_files():
         tests_passed += 1
         print("✓ Sample meta files test passed")
@@ -43,6 +43,7 @@ class APIValidator:
         self.repo_path = repo_path or os.getcwd()
         self.config_loader = ConfigLoader(config_path)
         self.config = self.config_loader.load_config()
+        self.ignore_regex = self.config_loader.get_ignore_regex()
         self.api_identifier = APIIdentifier(self.repo_path)
         self.meta_finder = MetaFileFinder(self.repo_path)
         self.meta_validator = MetaValidator(self.config)
@@ -356,14 +357,13 @@ class APIValidator:
         """Filter files based on extensions and patterns from config."""
         # Default to Python and JSON files if no config specified
         extensions = self.config.get('file_types', {}).get('extensions', ['.py', '.json'])
-        ignore_patterns = self.config.get('file_types', {}).get('ignore_patterns', [])
         
         filtered_files = []
         for file_path in file_paths:
             # Check extension
             if any(file_path.endswith(ext) for ext in extensions):
-                # Check ignore patterns
-                if not any(pattern in file_path for pattern in ignore_patterns):
+                # Check ignore patterns (precompiled into one regex)
+                if self.ignore_regex is None or not self.ignore_regex.search(file_path):
                     filtered_files.append(file_path)
         
         return filtered_files
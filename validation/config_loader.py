@@ -6,89 +6,195 @@ This module handles loading and parsing of validation configuration files.
 
 import json
 import os
-from typing import Dict, Any, Optional
+import re
+from functools import lru_cache
+from types import MappingProxyType
+from typing import Dict, Any, Mapping, Optional, Pattern, Tuple
 from pathlib import Path
 
 
+def _freeze(value: Any) -> Any:
+    """Return a read-only copy of a config value (mappings become proxies, lists become tuples)."""
+    if isinstance(value, Mapping):
+        return MappingProxyType({key: _freeze(item) for key, item in value.items()})
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(item) for item in value)
+    return value
+
+
+def _thaw(value: Any) -> Any:
+    """Return a plain dict/list copy of a frozen config value."""
+    if isinstance(value, Mapping):
+        return {key: _thaw(item) for key, item in value.items()}
+    if isinstance(value, tuple):
+        return [_thaw(item) for item in value]
+    return value
+
+
+# Default configuration, deep-frozen so it can be handed out without copying
+_DEFAULT = _freeze({
+    'file_types': {
+        'extensions': ['.py', '.json'],
+        'ignore_patterns': [
+            '__pycache__',
+            '.git',
+            'node_modules',
+            '.pytest_cache',
+            'venv',
+            '.venv',
+            'target',
+            'build',
+            'dist'
+        ]
+    },
+    'output': {
+        'format': 'text',  # 'text' or 'json'
+        'verbose': False
+    },
+    'pcf_rules': {
+        # PCF-specific validation rules will be added here
+        'enabled': True
+    },
+    'shp_ikp_rules': {
+        # SHP/IKP-specific validation rules will be added here
+        'enabled': True
+    }
+})
+
+
+def _scan_for_config(directory: Path) -> Optional[str]:
+    """Return the highest-priority config file directly inside directory, if any."""
+    try:
+        with os.scandir(directory) as entries:
+            present = {
+                entry.name for entry in entries
+                if entry.name in ConfigLoader._CONFIG_NAMES and entry.is_file()
+            }
+    except PermissionError:
+        # Listing needs read permission, but a search-only (x) directory can
+        # still be probed name by name
+        present = {
+            config_name for config_name in ConfigLoader.CONFIG_NAMES
+            if (directory / config_name).is_file()
+        }
+    except OSError:
+        return None
+    # Several candidates may exist; keep the priority order of CONFIG_NAMES
+    for config_name in ConfigLoader.CONFIG_NAMES:
+        if config_name in present:
+            return str(directory / config_name)
+    return None
+
+
+@lru_cache(maxsize=8)
+def _find_config_file_cached(cwd: str) -> Optional[str]:
+    """Search cwd and its parents for a config file, once per working directory."""
+    current_dir = Path(cwd)
+    
+    # Search in current directory and parent directories
+    for parent in [current_dir] + list(current_dir.parents):
+        found_path = _scan_for_config(parent)
+        if found_path:
+            return found_path
+    
+    return None
+
+
+@lru_cache(maxsize=8)
+def _load_parsed_config(path: str, mtime_ns: int) -> Any:
+    """
+    Parse a config file once per (path, mtime).
+    
+    The mtime is part of the key so an edited file is parsed again. The result
+    is frozen because it is shared between loaders.
+    """
+    return _freeze(ConfigLoader._load_config_file(path))
+
+
+@lru_cache(maxsize=8)
+def _compile_ignore_patterns(patterns: Tuple[str, ...]) -> Optional[Pattern[str]]:
+    """Compile ignore patterns into one regex that matches a path containing any of them."""
+    if not patterns:
+        return None
+    return re.compile('|'.join(re.escape(pattern) for pattern in patterns))
+
+
 class ConfigLoader:
     """Loads and manages validation configuration."""
     
-    DEFAULT_CONFIG = {
-        'file_types': {
-            'extensions': ['.py', '.json'],
-            'ignore_patterns': [
-                '__pycache__',
-                '.git',
-                'node_modules',
-                '.pytest_cache',
-                'venv',
-                '.venv',
-                'target',
-                'build',
-                'dist'
-            ]
-        },
-        'output': {
-            'format': 'text',  # 'text' or 'json'
-            'verbose': False
-        },
-        'pcf_rules': {
-            # PCF-specific validation rules will be added here
-            'enabled': True
-        },
-        'shp_ikp_rules': {
-            # SHP/IKP-specific validation rules will be added here
-            'enabled': True
-        }
-    }
+    # Read-only so callers cannot corrupt the shared defaults
+    DEFAULT_CONFIG = _DEFAULT
+    
+    # Candidate config file names, in priority order
+    CONFIG_NAMES = (
+        'api_validation.json',
+        '.api_validation.json',
+        'api_validation.yaml',
+        'api_validation.yml',
+        '.api_validation.yaml',
+        '.api_validation.yml'
+    )
+    _CONFIG_NAMES = frozenset(CONFIG_NAMES)
     
     def __init__(self, config_path: Optional[str] = None):
         """Initialize config loader with optional config file path."""
         self.config_path = config_path or self._find_config_file()
         self.config = None
     
-    def load_config(self) -> Dict[str, Any]:
-        """Load configuration from file or return default config."""
+    def load_config(self) -> Mapping[str, Any]:
+        """
+        Load configuration from file or return default config.
+        
+        The returned mapping is always read-only: nested sections are
+        mappingproxy objects and lists are tuples. Without a config file it is
+        the shared default configuration itself, not a copy.
+        """
         if self.config is not None:
             return self.config
         
-        if self.config_path and os.path.exists(self.config_path):
+        self.config = _DEFAULT
+        if self.config_path:
             try:
-                self.config = self._load_config_file(self.config_path)
+                # The stat doubles as the existence check
+                mtime_ns = os.stat(self.config_path).st_mtime_ns
+                custom = _load_parsed_config(self.config_path, mtime_ns)
                 # Merge with defaults to ensure all keys exist
-                self.config = self._merge_configs(self.DEFAULT_CONFIG, self.config)
+                if custom:
+                    self.config = _freeze(self._merge_configs(self.DEFAULT_CONFIG, custom))
+            except FileNotFoundError:
+                # A missing config file silently means defaults
+                pass
             except Exception as e:
                 print(f"Warning: Could not load config from {self.config_path}: {e}")
                 print("Using default configuration")
-                self.config = self.DEFAULT_CONFIG.copy()
-        else:
-            self.config = self.DEFAULT_CONFIG.copy()
         
         return self.config
     
+    def get_ignore_regex(self) -> Optional[Pattern[str]]:
+        """
+        Return the configured ignore_patterns compiled into a single regex.
+        
+        Patterns are plain substrings, so `regex.search(path)` is equivalent to
+        testing `pattern in path` for each one. Returns None when there are none.
+        """
+        patterns = self.load_config().get('file_types', {}).get('ignore_patterns', ())
+        if isinstance(patterns, str):
+            patterns = (patterns,)
+        return _compile_ignore_patterns(tuple(patterns))
+    
+    @staticmethod
+    def clear_cache():
+        """Forget discovered config paths and parsed config files."""
+        _find_config_file_cached.cache_clear()
+        _load_parsed_config.cache_clear()
+        _compile_ignore_patterns.cache_clear()
+    
     def _find_config_file(self) -> Optional[str]:
         """Find configuration file in current directory or parent directories."""
-        config_names = [
-            'api_validation.json',
-            '.api_validation.json',
-            'api_validation.yaml',
-            'api_validation.yml',
-            '.api_validation.yaml',
-            '.api_validation.yml'
-        ]
-        
-        current_dir = Path.cwd()
-        
-        # Search in current directory and parent directories
-        for parent in [current_dir] + list(current_dir.parents):
-            for config_name in config_names:
-                config_path = parent / config_name
-                if config_path.exists():
-                    return str(config_path)
-        
-        return None
+        return _find_config_file_cached(str(Path.cwd()))
     
-    def _load_config_file(self, config_path: str) -> Dict[str, Any]:
+    @staticmethod
+    def _load_config_file(config_path: str) -> Dict[str, Any]:
         """Load configuration from JSON or YAML file."""
         with open(config_path, 'r', encoding='utf-8') as f:
             content = f.read()
@@ -96,11 +202,12 @@ class ConfigLoader:
         if config_path.endswith('.json'):
             return json.loads(content) or {}
         elif config_path.endswith(('.yaml', '.yml')):
-            return self._parse_simple_yaml(content) or {}
+            return ConfigLoader._parse_simple_yaml(content) or {}
         else:
             raise ValueError(f"Unsupported config file format: {config_path}")
     
-    def _parse_simple_yaml(self, content: str) -> Dict[str, Any]:
+    @staticmethod
+    def _parse_simple_yaml(content: str) -> Dict[str, Any]:
         """
         Parse simple YAML content without external dependencies.
         
@@ -139,11 +246,12 @@ class ConfigLoader:
                     current_dict[key] = nested_dict
                     dict_stack.append((nested_dict, indent))
                 else:
-                    current_dict[key] = self._parse_yaml_value(value)
+                    current_dict[key] = ConfigLoader._parse_yaml_value(value)
         
         return result
     
-    def _parse_yaml_value(self, value: str) -> Any:
+    @staticmethod
+    def _parse_yaml_value(value: str) -> Any:
         """Parse a YAML value string into appropriate Python type."""
         value = value.strip()
         
@@ -174,12 +282,20 @@ class ConfigLoader:
         # Return as string
         return value
     
-    def _merge_configs(self, default: Dict[str, Any], custom: Dict[str, Any]) -> Dict[str, Any]:
-        """Recursively merge custom config with default config."""
-        result = default.copy()
+    def _merge_configs(self, default: Mapping[str, Any], custom: Mapping[str, Any]) -> Dict[str, Any]:
+        """
+        Recursively merge custom config with default config.
+        
+        Subtrees the custom config does not touch are shared with the default
+        rather than copied.
+        """
+        if not custom:
+            return default
+        
+        result = dict(default)
         
         for key, value in custom.items():
-            if key in result and isinstance(result[key], dict) and isinstance(value, dict):
+            if key in result and isinstance(result[key], Mapping) and isinstance(value, Mapping):
                 result[key] = self._merge_configs(result[key], value)
             else:
                 result[key] = value
@@ -189,5 +305,5 @@ class ConfigLoader:
     def save_default_config(self, output_path: str = 'api_validation.json'):
         """Save the default configuration to a file for reference."""
         with open(output_path, 'w', encoding='utf-8') as f:
-            json.dump(self.DEFAULT_CONFIG, f, indent=2)
+            json.dump(_thaw(self.DEFAULT_CONFIG), f, indent=2)
         print(f"Default configuration saved to {output_path}") 
\ No newline at end of file
@@ -5,76 +5,364 @@ This module provides utilities for interacting with git,
 specifically for modifying commit messages during push operations.
 """
 
+import io
 import subprocess
-import tempfile
 import os
-from typing import List, Optional
+from typing import Dict, List, Optional, Tuple
 from datetime import datetime
 
+# Separator line framing the validation override notice
+_SEP = "=" * 50
+
+
+class _GitSession:
+    """
+    Long-running ``git cat-file`` processes for object lookups.
+
+    Each process is started lazily on first use and then answers one
+    request per line over its stdin/stdout, so repeated lookups do not
+    pay for a fresh fork+exec of git.
+    """
+
+    def __init__(self, repo_path: str):
+        """Initialize with the repository path the processes run in."""
+        self.repo_path = repo_path
+        self._check_proc: Optional[subprocess.Popen] = None
+        self._batch_proc: Optional[subprocess.Popen] = None
+
+    def _spawn(self, mode: str) -> subprocess.Popen:
+        return subprocess.Popen(
+            ['git', 'cat-file', mode],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            cwd=self.repo_path
+        )
+
+    @staticmethod
+    def _request(proc: subprocess.Popen, rev: str) -> bytes:
+        """Send one object name to a cat-file process and return its header line."""
+        try:
+            proc.stdin.write(rev.encode('utf-8') + b'\n')
+            proc.stdin.flush()
+            return proc.stdout.readline()
+        except OSError:
+            return b''
+
+    def check(self, rev: str) -> Optional[Tuple[str, str]]:
+        """Return ``(object name, object type)`` for a revision, or None if it does not resolve."""
+        if self._check_proc is None:
+            self._check_proc = self._spawn('--batch-check=%(objectname) %(objecttype)')
+        header = self._request(self._check_proc, rev)
+        if not header:
+            self._close_proc(self._check_proc)
+            self._check_proc = None
+            return None
+        fields = header.split()
+        if len(fields) != 2 or fields[1] == b'missing':
+            return None
+        return fields[0].decode('ascii'), fields[1].decode('ascii')
+
+    def read(self, rev: str) -> Optional[Tuple[str, str, bytes]]:
+        """Return ``(object name, object type, contents)`` for a revision, or None if it does not resolve."""
+        if self._batch_proc is None:
+            self._batch_proc = self._spawn('--batch')
+        header = self._request(self._batch_proc, rev)
+        if not header:
+            self._close_proc(self._batch_proc)
+            self._batch_proc = None
+            return None
+        fields = header.split()
+        if len(fields) != 3:
+            return None
+        size = int(fields[2])
+        # The payload is followed by a single LF terminator
+        data = self._batch_proc.stdout.read(size + 1)
+        return fields[0].decode('ascii'), fields[1].decode('ascii'), data[:size]
+
+    @staticmethod
+    def _close_proc(proc: Optional[subprocess.Popen]):
+        if proc is None:
+            return
+        try:
+            proc.stdin.close()
+        except OSError:
+            pass
+        try:
+            proc.wait(timeout=5)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+            proc.wait()
+        proc.stdout.close()
+
+    def close(self):
+        """Shut down any running cat-file processes."""
+        self._close_proc(self._check_proc)
+        self._close_proc(self._batch_proc)
+        self._check_proc = None
+        self._batch_proc = None
+
 
 class GitUtils:
     """Utilities for git operations."""
     
+    # Commit headers commit-tree can reproduce; the old signature is replaced as
+    # `git commit --amend` does. Anything else (encoding, mergetag, ...) means
+    # amending through porcelain so it is carried over.
+    _PLUMBING_HEADERS = frozenset({b'tree', b'parent', b'author', b'committer', b'gpgsig', b'gpgsig-sha256'})
+    
     def __init__(self, repo_path: Optional[str] = None):
         """Initialize with optional repository path."""
         self.repo_path = repo_path or os.getcwd()
+        self._session: Optional[_GitSession] = None
+        # HEAD sha and git config, only cached for the duration of an amend/append call
+        self._head_sha: Optional[str] = None
+        self._config: Optional[Dict[str, Optional[str]]] = None
+        # Repository and branch don't change during a validation run
+        self._is_repo: Optional[bool] = None
+        self._branch: Optional[str] = None
+        self._branch_cached = False
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+    
+    def __del__(self):
+        try:
+            self.close()
+        except Exception:
+            pass
+    
+    def close(self):
+        """Shut down the persistent git processes, if any were started."""
+        if self._session is not None:
+            self._session.close()
+            self._session = None
+    
+    def invalidate(self):
+        """Forget cached repository state so the next lookups query git again."""
+        self._head_sha = None
+        self._config = None
+        self._is_repo = None
+        self._branch = None
+        self._branch_cached = False
+    
+    def _get_session(self) -> _GitSession:
+        if self._session is None:
+            self._session = _GitSession(self.repo_path)
+        return self._session
     
     def get_last_commit_message(self) -> str:
         """Get the message of the last commit."""
+        obj = self._get_session().read('HEAD')
+        if obj is None or obj[1] != 'commit':
+            raise Exception("Failed to get last commit message: HEAD does not point to a commit")
+        headers, message = self._split_commit(obj[2])
+        encoding = headers.get(b'encoding', [b'utf-8'])[0].decode('ascii', errors='replace')
+        return self._decode(message, encoding).strip()
+    
+    def get_last_commit_hash(self) -> str:
+        """Get the hash of the last commit."""
+        if self._head_sha is not None:
+            return self._head_sha
+        obj = self._get_session().check('HEAD')
+        if obj is None or obj[1] != 'commit':
+            raise Exception("Failed to get last commit hash: HEAD does not point to a commit")
+        return obj[0]
+    
+    def amend_commit_message(self, new_message: str) -> bool:
+        """
+        Amend the last commit with a new message.
+        Returns True if successful, False otherwise.
+        
+        The commit is rewritten with `git commit-tree`/`git update-ref` rather
+        than `git commit --amend`: author, tree and all parents are kept and
+        commit.gpgSign is honoured, but no commit hooks (pre-commit, commit-msg,
+        post-commit, post-rewrite) run and notes are not carried over. Commits
+        with other headers (a non-UTF-8 encoding, mergetag, ...) are amended
+        with `git commit --amend` instead so those headers survive.
+        """
         try:
+            return self._amend_commit_message(new_message)
+        finally:
+            self._head_sha = None
+            self._config = None
+    
+    def _amend_commit_message(self, new_message: str) -> bool:
+        """Amend the last commit, leaving the resolved HEAD sha cached for the caller."""
+        if not self._can_amend_commit():
+            print("Cannot amend commit (may have uncommitted changes or other git state issues). Please commit or stash your changes and try again.")
+            return False
+        head = self._get_session().read('HEAD')
+        if head is None or head[1] != 'commit':
+            print("Failed to amend commit message: HEAD does not point to a commit")
+            return False
+        old_sha, _, raw_commit = head
+        headers, _ = self._split_commit(raw_commit)
+        
+        # Both commit-tree and commit label the new message with i18n.commitEncoding
+        message = self._clean_message(new_message)
+        message_bytes = self._encode(message, self._get_config().get('i18n.commitencoding') or 'utf-8')
+        if set(headers) - self._PLUMBING_HEADERS:
+            return self._porcelain_amend(message_bytes)
+        
+        # Reuse the tree, parents and author of HEAD so only the message changes
+        env = os.environ.copy()
+        env.update(self._author_env(headers[b'author'][0]))
+        commit_tree_args = ['git', 'commit-tree', headers[b'tree'][0].decode('ascii')]
+        for parent in headers.get(b'parent', []):
+            commit_tree_args += ['-p', parent.decode('ascii')]
+        if self._gpg_sign_enabled():
+            # commit-tree ignores commit.gpgSign, so ask for the signature explicitly
+            commit_tree_args.append('-S')
+        commit_tree_args += ['-F', '-']
+        try:
+            # Plumbing only: no index refresh, worktree scan or commit hooks
             result = subprocess.run(
-                ['git', 'log', '-1', '--pretty=format:%B'],
+                commit_tree_args,
+                input=message_bytes,
+                check=True,
                 capture_output=True,
-                text=True,
+                cwd=self.repo_path,
+                env=env
+            )
+            new_sha = result.stdout.strip().decode('ascii')
+            subject = message.split('\n', 1)[0]
+            # Passing the old sha makes the ref update fail if HEAD moved meanwhile
+            subprocess.run(
+                ['git', 'update-ref', '-m', f'commit (amend): {subject}', 'HEAD', new_sha, old_sha],
                 check=True,
+                capture_output=True,
                 cwd=self.repo_path
             )
-            return result.stdout.strip()
+            self._head_sha = new_sha
+            return True
         except subprocess.CalledProcessError as e:
-            raise Exception(f"Failed to get last commit message: {e}")
+            print(f"Failed to amend commit message: {e}")
+            return False
     
-    def get_last_commit_hash(self) -> str:
-        """Get the hash of the last commit."""
+    def _porcelain_amend(self, message_bytes: bytes) -> bool:
+        """Amend with `git commit --amend`, which keeps every header of the old commit."""
         try:
-            result = subprocess.run(
-                ['git', 'rev-parse', 'HEAD'],
-                capture_output=True,
-                text=True,
+            subprocess.run(
+                # Like commit-tree, accept an empty commit and keep '#' lines in the cleaned message
+                ['git', 'commit', '--amend', '--allow-empty', '--cleanup=whitespace', '-F', '-'],
+                input=message_bytes,
                 check=True,
+                capture_output=True,
                 cwd=self.repo_path
             )
-            return result.stdout.strip()
+            return True
         except subprocess.CalledProcessError as e:
-            raise Exception(f"Failed to get last commit hash: {e}")
+            print(f"Failed to amend commit message: {e}")
+            return False
     
-    def amend_commit_message(self, new_message: str) -> bool:
+    @staticmethod
+    def _split_commit(raw_commit: bytes) -> Tuple[Dict[bytes, List[bytes]], bytes]:
+        """Split a raw commit object into its headers (name -> values) and message."""
+        header_block, _, message = raw_commit.partition(b'\n\n')
+        headers: Dict[bytes, List[bytes]] = {}
+        values: List[bytes] = []
+        for line in header_block.split(b'\n'):
+            if line.startswith(b' ') and values:
+                # Continuation of a multi-line header such as gpgsig or mergetag
+                values[-1] += b'\n' + line[1:]
+                continue
+            key, _, value = line.partition(b' ')
+            values = headers.setdefault(key, [])
+            values.append(value)
+        return headers, message
+    
+    @staticmethod
+    def _decode(data: bytes, encoding: str) -> str:
+        """Decode commit text in the given git encoding name, falling back to UTF-8."""
+        try:
+            return data.decode(encoding, errors='replace')
+        except LookupError:
+            return data.decode('utf-8', errors='replace')
+    
+    @staticmethod
+    def _encode(text: str, encoding: str) -> bytes:
+        """Encode commit text in the given git encoding name, falling back to UTF-8."""
+        try:
+            return text.encode(encoding, errors='replace')
+        except LookupError:
+            return text.encode('utf-8')
+    
+    def _get_config(self) -> Dict[str, Optional[str]]:
         """
-        Amend the last commit with a new message.
-        Returns True if successful, False otherwise.
+        Read the git config keys the amend flow needs with a single `git config` call.
+        
+        Keys map to their last value, or to None for a bare boolean key such as
+        `gpgsign` with no `= value`.
         """
-        if not self._can_amend_commit():
-            print("Cannot amend commit (may have uncommitted changes or other git state issues). Please commit or stash your changes and try again.")
+        if self._config is None:
+            result = subprocess.run(
+                ['git', 'config', '-z', '--get-regexp', r'^(user\.name|user\.email|commit\.gpgsign|i18n\.commitencoding)$'],
+                capture_output=True,
+                cwd=self.repo_path
+            )
+            config = {}
+            # -z output is "key\nvalue\0", or "key\0" for a key without a value
+            for entry in result.stdout.split(b'\0'):
+                if not entry:
+                    continue
+                key, has_value, value = entry.partition(b'\n')
+                config[key.decode('utf-8')] = value.decode('utf-8', errors='replace').strip() if has_value else None
+            self._config = config
+        return self._config
+    
+    def _gpg_sign_enabled(self) -> bool:
+        """Check whether commit.gpgSign asks for signed commits."""
+        config = self._get_config()
+        if 'commit.gpgsign' not in config:
+            return False
+        value = config['commit.gpgsign']
+        # A bare key means true; otherwise use git's boolean spellings
+        if value is None:
+            return True
+        value = value.lower()
+        if value in ('true', 'yes', 'on'):
+            return True
+        if value in ('false', 'no', 'off', ''):
             return False
         try:
-            with tempfile.NamedTemporaryFile(mode='w', suffix='.txt', delete=False, encoding='utf-8') as f:
-                f.write(new_message)
-                temp_file = f.name
-            try:
-                subprocess.run(
-                    ['git', 'commit', '--amend', '-F', temp_file],
-                    check=True,
-                    capture_output=True,
-                    cwd=self.repo_path
-                )
-                return True
-            finally:
-                try:
-                    os.unlink(temp_file)
-                except OSError:
-                    pass
-        except subprocess.CalledProcessError as e:
-            print(f"Failed to amend commit message: {e}")
+            return int(value) != 0
+        except ValueError:
             return False
+    
+    @staticmethod
+    def _author_env(author: bytes) -> Dict[str, str]:
+        """Translate a commit's author header into GIT_AUTHOR_* variables."""
+        ident = author.decode('utf-8', errors='replace')
+        name, _, rest = ident.partition(' <')
+        email, _, date = rest.partition('> ')
+        return {
+            'GIT_AUTHOR_NAME': name,
+            'GIT_AUTHOR_EMAIL': email,
+            'GIT_AUTHOR_DATE': date
+        }
+    
+    @staticmethod
+    def _clean_message(message: str) -> str:
+        """
+        Apply git's default whitespace cleanup to a commit message.
+        
+        `git commit` does this itself; `git commit-tree` stores the message verbatim.
+        """
+        lines = []
+        # Split on LF and trim only space/tab/CR, as git does; splitlines() and a
+        # bare rstrip() would also act on \x0c, \x1c-\x1e, \x85, \u2028, ...
+        for line in message.split('\n'):
+            line = line.rstrip(' \t\r')
+            # Collapse runs of blank lines into one
+            if line or (lines and lines[-1]):
+                lines.append(line)
+        while lines and not lines[-1]:
+            lines.pop()
+        return '\n'.join(lines) + '\n'
 
     def save_validation_details_local(self, justification: str, errors: List[str], warnings: List[str]):
         """
@@ -85,10 +373,11 @@ class GitUtils:
         short_commit_id = commit_id[:7] if commit_id else "unknown"
         branch = self.get_current_branch() or "(unknown)"
         # Get GitHub user from git config
-        try:
-            user_name = subprocess.run(['git', 'config', 'user.name'], capture_output=True, text=True, check=True, cwd=self.repo_path).stdout.strip()
-            user_email = subprocess.run(['git', 'config', 'user.email'], capture_output=True, text=True, check=True, cwd=self.repo_path).stdout.strip()
-        except Exception:
+        config = self._get_config()
+        if 'user.name' in config and 'user.email' in config:
+            user_name = config['user.name'] or ""
+            user_email = config['user.email'] or ""
+        else:
             user_name = "(unknown)"
             user_email = "(unknown)"
         timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
@@ -104,13 +393,12 @@ class GitUtils:
             f.write(f"JUSTIFICATION: {justification}\n\n")
             if errors:
                 f.write(f"VALIDATION ERRORS ({len(errors)}):\n")
-                for error in errors:
-                    f.write(f"  - {error}\n")
+                # One write per section rather than one per line
+                f.write("".join([f"  - {error}\n" for error in errors]))
                 f.write("\n")
             if warnings:
                 f.write(f"VALIDATION WARNINGS ({len(warnings)}):\n")
-                for warning in warnings:
-                    f.write(f"  - {warning}\n")
+                f.write("".join([f"  - {warning}\n" for warning in warnings]))
                 f.write("\n")
             f.write("========================\n")
         print(f"Full validation details saved locally to {file_path} (not committed)")
@@ -118,24 +406,16 @@ class GitUtils:
     def _can_amend_commit(self) -> bool:
         """Check if the current git state allows amending the last commit (ignores untracked files)."""
         try:
+            # HEAD itself is resolved by the amend's cat-file read
             result = subprocess.run(
                 ['git', 'status', '--porcelain'],
                 capture_output=True,
-                text=True,
                 check=True,
                 cwd=self.repo_path
             )
             # Ignore untracked files (lines starting with '??')
-            lines = [line for line in result.stdout.splitlines() if not line.startswith('??')]
-            if lines:
-                return False
-            subprocess.run(
-                ['git', 'rev-parse', 'HEAD'],
-                capture_output=True,
-                check=True,
-                cwd=self.repo_path
-            )
-            return True
+            lines = [line for line in result.stdout.splitlines() if not line.startswith(b'??')]
+            return not lines
         except subprocess.CalledProcessError:
             return False
     
@@ -149,20 +429,16 @@ class GitUtils:
         Create a summary appendix for the commit message with validation override info.
         Only include counts, justification, and a reference to the local file.
         """
-        appendix_parts = [
-            "\n" + "="*50,
-            "⚠️  VALIDATION OVERRIDE NOTICE",
-            "="*50,
-            "",
-            f"JUSTIFICATION: {justification}",
-            f"Validation errors: {len(errors)}",
-            f"Validation warnings: {len(warnings)}",
-            "",
-            "Full validation details are saved locally in a file named .apigenie_validation_<commit_id>_<timestamp>.txt in the repo root (not committed).",
-            "Review and address these issues in a follow-up commit.",
-            "="*50
-        ]
-        return "\n".join(appendix_parts)
+        buf = io.StringIO()
+        w = buf.write
+        w(f"\n{_SEP}\n⚠️  VALIDATION OVERRIDE NOTICE\n{_SEP}\n\n")
+        w(f"JUSTIFICATION: {justification}\n")
+        w(f"Validation errors: {len(errors)}\n")
+        w(f"Validation warnings: {len(warnings)}\n\n")
+        w("Full validation details are saved locally in a file named .apigenie_validation_<commit_id>_<timestamp>.txt in the repo root (not committed).\n")
+        w("Review and address these issues in a follow-up commit.\n")
+        w(_SEP)
+        return buf.getvalue()
     
     def append_to_commit_message(
         self,
@@ -178,40 +454,52 @@ class GitUtils:
             current_message = self.get_last_commit_message()
             appendix = self.create_validation_failure_appendix(justification, errors, warnings)
             new_message = current_message + appendix
-            success = self.amend_commit_message(new_message)
+            success = self._amend_commit_message(new_message)
             if success:
                 self.save_validation_details_local(justification, errors, warnings)
             return success
         except Exception as e:
             print(f"Failed to append to commit message: {e}")
             return False
+        finally:
+            # The cached sha and config are only trusted within this flow
+            self._head_sha = None
+            self._config = None
     
     def is_git_repository(self) -> bool:
         """Check if current directory is a git repository."""
+        if self._is_repo is not None:
+            return self._is_repo
         try:
             subprocess.run(
                 ['git', 'rev-parse', '--git-dir'],
-                capture_output=True,
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL,
                 check=True,
                 cwd=self.repo_path
             )
-            return True
+            self._is_repo = True
         except subprocess.CalledProcessError:
-            return False
+            self._is_repo = False
+        return self._is_repo
     
     def get_current_branch(self) -> Optional[str]:
         """Get the name of the current git branch."""
+        if self._branch_cached:
+            return self._branch
         try:
             result = subprocess.run(
                 ['git', 'rev-parse', '--abbrev-ref', 'HEAD'],
                 capture_output=True,
-                text=True,
                 check=True,
                 cwd=self.repo_path
             )
-            return result.stdout.strip()
+            # Branch names may be non-ASCII, so decode as UTF-8 rather than ASCII
+            self._branch = result.stdout.strip().decode('utf-8', errors='replace')
         except subprocess.CalledProcessError:
-            return None
+            self._branch = None
+        self._branch_cached = True
+        return self._branch
     
     def has_uncommitted_changes(self) -> bool:
         """Check if there are uncommitted changes."""
@@ -219,7 +507,6 @@ class GitUtils:
             result = subprocess.run(
                 ['git', 'status', '--porcelain'],
                 capture_output=True,
-                text=True,
                 check=True,
                 cwd=self.repo_path
             )